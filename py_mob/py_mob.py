@@ -1,6 +1,6 @@
 # py_mob/py_mob.py
 
-import numpy, scipy.stats, sklearn.isotonic, sklearn.cluster, lightgbm, tabulate, pkg_resources
+import operator, numpy
 
 
 def get_data(data):
@@ -26,6 +26,8 @@ def get_data(data):
     py_mob.view_bin(py_mob.qtl_bin(data["ltv"], data["bad"]))
   """
 
+  import pkg_resources
+
   _p = pkg_resources.resource_filename("py_mob", "data/" + data + ".csv")
 
   _d = numpy.recfromcsv(_p, delimiter = ',', names = True, encoding = 'latin-1')
@@ -59,30 +61,25 @@ def cal_woe(x, bin):
     # {'x': 105.0, 'bin': 5, 'woe': 0.1829}
   """
 
-  _cut = sorted(bin['cut'] + [numpy.PINF, numpy.NINF])
-
-  _dat = [[_1[0], _1[1], _2] for _1, _2 in zip(enumerate(x), ~numpy.isnan(x))]
+  _x = numpy.asarray(x, dtype = numpy.float64)
+  _m = numpy.isnan(_x)
 
-  _m1 = [_[:2] for _ in _dat if _[2] == 0]
-  _l1 = [_[:2] for _ in _dat if _[2] == 1]
+  _cut = numpy.asarray(bin['cut'], dtype = numpy.float64)
+  if not numpy.all(numpy.diff(_cut) > 0):
+    _cut = numpy.unique(_cut)
 
-  _l2 = [[*_1, _2] for _1, _2 in zip(_l1, numpy.searchsorted(_cut, [_[1] for _ in _l1]).tolist())]
+  _woe = dict((_['bin'], _['woe']) for _ in bin['tbl'])
+  _lut = numpy.array([_woe.get(i + 1, 0) for i in range(len(_cut) + 1)], dtype = numpy.float64)
 
-  flatten = lambda l: [item for subl in l for item in subl]
- 
-  _l3 = flatten([[[*l, b['woe']] for l in _l2 if l[2] == b['bin']] for b in bin['tbl'] if b['bin'] > 0])
+  _b = numpy.ones(len(_x), dtype = numpy.intp)
+  _b[~_m] += numpy.searchsorted(_cut, _x[~_m])
+  _w = _lut[_b - 1]
 
-  if len(_m1) > 0:
-    if len([_ for _ in bin['tbl'] if _['miss'] > 0]) > 0:
-      _m2 = [l + [_['bin'] for _ in bin['tbl'] if _['miss'] > 0] 
-               + [_['woe'] for _ in bin['tbl'] if _['miss'] > 0] for l in _m1]
-    else:
-      _m2 = [l + [0, 0] for l in _m1]
-    _l3.extend(_m2)
+  if _m.any():
+    _mb = [_ for _ in bin['tbl'] if _['miss'] > 0]
+    _b[_m], _w[_m] = (_mb[0]['bin'], _mb[0]['woe']) if len(_mb) > 0 else (0, 0)
 
-  _key = ["x", "bin", "woe"]
-
-  return(list(dict(zip(_key, _[1:])) for _ in sorted(_l3, key = lambda x: x[0])))
+  return([{"x": _1, "bin": _2, "woe": _3} for _1, _2, _3 in zip(_x.tolist(), _b.tolist(), _w.tolist())])
 
 
 ########## 02. summ_bin() ########## 
@@ -103,12 +100,12 @@ def summ_bin(x):
     # {'sample size': 5837, 'bad rate': 0.2049, 'iv': 0.185, 'ks': 16.88, 'missing': 0.0002}
   """
 
-  _freq = sum(_['freq'] for _ in x['tbl'])
-  _bads = sum(_['bads'] for _ in x['tbl'])
-  _miss = sum(_['miss'] for _ in x['tbl'])
+  _l = list(zip(*[(_['freq'], _['bads'], _['miss'], _['iv'], _['ks']) for _ in x['tbl']]))
+
+  _freq, _bads, _miss = sum(_l[0]), sum(_l[1]), sum(_l[2])
 
-  _iv = round(sum(_['iv'] for _ in x['tbl']), 4)
-  _ks = round(max(_["ks"] for _ in x["tbl"]), 2)
+  _iv = round(sum(_l[3]), 4)
+  _ks = round(max(_l[4]), 2)
 
   _br = round(_bads / _freq, 4)
   _mr = round(_miss / _freq, 4)
@@ -133,6 +130,8 @@ def view_bin(x):
     view_bin(qtl_bin(df.ltv, df.bad))
   """
 
+  import tabulate
+
   tabulate.PRESERVE_WHITESPACE = True
 
   _sel = ["bin", "freq", "miss", "bads", "rate", "woe", "iv", "ks"]
@@ -159,16 +158,35 @@ def qcut(x, n):
 
   Example:
     qcut(range(10), 3)
-    # [3, 6]
+    # [3.0, 6.0]
+  """
+
+  _x = numpy.asarray(x, dtype = numpy.float64)
+  return(qcut_sorted(numpy.sort(_x[~numpy.isnan(_x)]), n).tolist())
+
+
+########## 05. qcut_sorted() ##########
+
+def qcut_sorted(x, n):
+  """
+  The function discretizes a numeric vector already sorted in the ascending 
+  order into n pieces based on quantiles and is an utility function that is 
+  not supposed to be called directly by users.
+
+  Parameters:
+    x: A 1-D numpy array sorted in the ascending order without missing values.
+    n: An integer indicating the number of categories to discretize.
+
+  Returns:
+    A numpy array of numeric values to divide the vector x into n categories,
+    which is identical to the outcome of qcut().
   """
 
   _q = numpy.linspace(0, 100, n, endpoint = False)[1:]
-  _x = [_ for _ in x if not numpy.isnan(_)]
-  _c = numpy.unique(numpy.percentile(_x, _q, interpolation = "lower"))
-  return([_ for _ in _c])
+  return(numpy.unique(x[numpy.floor((len(x) - 1) * (_q / 100)).astype(numpy.intp)]))
 
 
-########## 05. manual_bin() ##########
+########## 06. manual_bin() ##########
 
 def manual_bin(x, y, cuts):
   """
@@ -195,23 +213,30 @@ def manual_bin(x, y, cuts):
     # {'bin': 4, 'freq': 1016, 'miss': 0, 'bads':  42.0, 'minx': 751.0, 'maxx': 848.0}
   """
 
-  _x = [_ for _ in x]
-  _y = [_ for _ in y]
-  _c = sorted([_ for _ in set(cuts)] + [numpy.NINF, numpy.PINF])
-  _g = numpy.searchsorted(_c, _x).tolist()
+  _x = numpy.ascontiguousarray(x, dtype = numpy.float64)
+  _y = numpy.ascontiguousarray(y, dtype = numpy.float64)
+  _c = numpy.asarray(cuts, dtype = numpy.float64)
+  if not numpy.all(numpy.diff(_c) > 0):
+    _c = numpy.unique(_c)
+  _k = len(_c) + 1
 
-  _l1 = sorted(zip(_g, _x, _y), key = lambda x: x[0])
-  _l2 = zip(set(_g), [[l for l in _l1 if l[0] == g] for g in set(_g)])
+  _g = numpy.searchsorted(_c, _x)
 
-  return(sorted([dict(zip(["bin", "freq", "miss", "bads", "minx", "maxx"],
-                          [_1, len(_2), 0,
-                           sum([_[2] for _ in _2]),
-                           min([_[1] for _ in _2]),
-                           max([_[1] for _ in _2])])) for _1, _2 in _l2],
-                key = lambda x: x["bin"]))
+  _freq = numpy.bincount(_g, minlength = _k)
+  _bads = numpy.bincount(_g, weights = _y, minlength = _k)
 
+  _o = numpy.argsort(_g, kind = "stable")
+  _u = numpy.flatnonzero(_freq)
+  _i = (numpy.cumsum(_freq) - _freq)[_u]
 
-########## 06. miss_bin() ##########
+  _minx = numpy.minimum.reduceat(_x[_o], _i)
+  _maxx = numpy.maximum.reduceat(_x[_o], _i)
+
+  return([{"bin": _1 + 1, "freq": int(_freq[_1]), "miss": 0, "bads": float(_bads[_1]),
+           "minx": _2, "maxx": _3} for _1, _2, _3 in zip(_u.tolist(), _minx.tolist(), _maxx.tolist())])
+
+
+########## 07. miss_bin() ##########
 
 def miss_bin(y):
   """
@@ -225,11 +250,13 @@ def miss_bin(y):
     A dictionary.
   """
 
-  return({"bin": 0, "freq": len([_ for _ in y]), "miss": len([_ for _ in y]), 
-          "bads": sum([_ for _ in y]), "minx": numpy.nan, "maxx": numpy.nan})
+  _y = numpy.asarray(y, dtype = numpy.float64)
+
+  return({"bin": 0, "freq": _y.size, "miss": _y.size, 
+          "bads": float(_y.sum()), "minx": numpy.nan, "maxx": numpy.nan})
 
 
-########## 07. gen_rule() ##########
+########## 08. gen_rule() ##########
 
 def gen_rule(tbl, pts):
   """
@@ -246,28 +273,23 @@ def gen_rule(tbl, pts):
     A list of dictionaries with binning rules 
   """
 
+  _s = [str(_) for _ in pts]
+  _n = len(_s)
+
+  _r = ["numpy.isnan($X$)", f"$X$ <= {_s[0]}"] + \
+       [f"$X$ > {_1} and $X$ <= {_2}" for _1, _2 in zip(_s[:-1], _s[1:])] + [f"$X$ > {_s[-1]}"]
+
   for _ in tbl:
-    if _["bin"] == 0:
-      _["rule"] = "numpy.isnan($X$)"
-    elif _["bin"] == len(pts) + 1:
-      if _["miss"] == 0:
-        _["rule"] = "$X$ > " + str(pts[-1])
-      else:
-        _["rule"] = "$X$ > " + str(pts[-1]) + " or numpy.isnan($X$)"
-    elif _["bin"] == 1:
-      if _["miss"] == 0:
-        _["rule"] = "$X$ <= " + str(pts[0])
-      else:
-        _["rule"] = "$X$ <= " + str(pts[0]) + " or numpy.isnan($X$)"
-    else:
-        _["rule"] = "$X$ > " + str(pts[_["bin"] - 2]) + " and $X$ <= " + str(pts[_["bin"] - 1])
+    _b = _["bin"]
+    _["rule"] = _r[_b] + " or numpy.isnan($X$)" if _["miss"] > 0 and _b in (1, _n + 1) else _r[_b]
 
   _sel = ["bin", "freq", "miss", "bads", "rate", "woe", "iv", "ks", "rule"]
+  _get = operator.itemgetter(*_sel)
 
-  return([{k: _[k] for k in _sel} for _ in tbl])
+  return([dict(zip(_sel, _get(_))) for _ in tbl])
 
 
-########## 08. gen_woe() ##########
+########## 09. gen_woe() ##########
 
 def gen_woe(x):
   """
@@ -282,35 +304,36 @@ def gen_woe(x):
     A list of dictionaries with additional keys to the input.
   """
 
-  _freq = sum(_["freq"] for _ in x)
-  _bads = sum(_["bads"] for _ in x)
+  _l1 = sorted(x, key = lambda _x: _x["bin"])
 
-  _l1 = sorted([{**_, 
-                 "rate": round(_["bads"] / _["freq"], 4),
-                 "woe" : round(numpy.log((_["bads"] / _bads) / ((_["freq"] - _["bads"]) / (_freq - _bads))), 4),
-                 "iv"  : round((_["bads"] / _bads - (_["freq"] - _["bads"]) / (_freq - _bads)) *
-                               numpy.log((_["bads"] / _bads) / ((_["freq"] - _["bads"]) / (_freq - _bads))), 4)
-                } for _ in x], key = lambda _x: _x["bin"])
+  _freq = numpy.array([_["freq"] for _ in _l1], dtype = numpy.float64)
+  _bads = numpy.array([_["bads"] for _ in _l1], dtype = numpy.float64)
 
-  cumsum = lambda x: [sum([_ for _ in x][0:(i + 1)]) for i in range(len(x))]
+  _goods = _freq - _bads
 
-  _cumb = cumsum([_['bads'] / _bads for _ in _l1])
-  _cumg = cumsum([(_['freq'] - _['bads']) / (_freq - _bads) for _ in _l1])
-  _ks = [round(numpy.abs(_[0] - _[1]) * 100, 2) for _ in zip(_cumb, _cumg)]
-  
-  return([{**_1, "ks": _2} for _1, _2 in zip(_l1, _ks)])
+  _pb = _bads / _bads.sum()
+  _pg = _goods / _goods.sum()
 
+  _woe = numpy.log(_pb / _pg)
+  _iv = (_pb - _pg) * _woe
+  _ks = numpy.abs(numpy.cumsum(_pb) - numpy.cumsum(_pg)) * 100
 
-########## 09. add_miss() ##########
+  return([{**_1, "rate": _2, "woe": _3, "iv": _4, "ks": _5} for _1, _2, _3, _4, _5 in
+          zip(_l1, numpy.round(_bads / _freq, 4).tolist(), numpy.round(_woe, 4).tolist(),
+              numpy.round(_iv, 4).tolist(), numpy.round(_ks, 2).tolist())])
 
-def add_miss(d, l):
+
+########## 10. add_miss() ##########
+
+def add_miss(y, l):
   """
   The function appends missing value category, if any, to the binning outcome 
   and is an utility function and is not supposed to be called directly by 
   the user.  
 
   Parameters:
-    d : A list with lists generated by input vectors of binning functions.
+    y : A numeric vector of y values with missing x values, as returned by 
+        split_nan().
     l : A list of dicts.
 
   Returns:
@@ -319,8 +342,8 @@ def add_miss(d, l):
 
   _l = l[:]
 
-  if len([_ for _ in d if _[2] == 0]) > 0:
-    _m = miss_bin([_[1] for _ in d if _[2] == 0])
+  if y.size > 0:
+    _m = miss_bin(y)
     if _m["bads"] == 0:
       for _ in ['freq', 'miss', 'bads']:
         _l[0][_]  = _l[0][_]  + _m[_]
@@ -333,7 +356,214 @@ def add_miss(d, l):
   return(_l)
 
 
-########## 10. qtl_bin() ##########
+########## 11. gen_bin() ##########
+
+def gen_bin(y, pts, tbl):
+  """
+  The function generates the binning outcome based on the binning table and 
+  a list of cut points and is an utility function that is not supposed to 
+  be called directly by users.
+
+  Parameters:
+    y   : A numeric vector of y values with missing x values, as returned by 
+          split_nan().
+    pts : A list cut points for the binning
+    tbl : A list of dictionaries for the binning outcome in the same format 
+          as manual_bin().
+
+  Returns:
+    A dictionary with two keys:
+      "cut" : A numeric vector with cut points applied to the x vector.
+      "tbl" : A list of dictionaries summarizing the binning outcome.
+  """
+
+  _l1 = add_miss(y, sorted(tbl, key = lambda x: x["bads"] / x["freq"]))
+
+  return({"cut": pts, "tbl": gen_rule(gen_woe(_l1), pts)})
+
+
+########## 12. split_nan() ##########
+
+def split_nan(x, y):
+  """
+  The function splits the y vector based on missing values in the x vector 
+  and is an utility function that is not supposed to be called directly by 
+  users.
+
+  Parameters:
+    x : A numeric vector to discretize. It is a list, 1-D numpy array, 
+        or pandas series.
+    y : A numeric vector with binary values of 0/1 and with the same length 
+        of x. It is a list, 1-D numpy array, or pandas series.
+
+  Returns:
+    A tuple of three numpy arrays: x values without missing values, the
+    corresponding y values, and y values with missing x values.
+  """
+
+  _x = numpy.asarray(x, dtype = numpy.float64)
+  _y = numpy.asarray(y, dtype = numpy.float64)
+  _m = numpy.isnan(_x)
+
+  return(_x[~_m], _y[~_m], _y[_m])
+
+
+########## 13. cut_bin() ##########
+
+def cut_bin(x, y, cuts):
+  """
+  The function searches through a list of candidate cut points for the one 
+  with the most cut points that yields strictly monotonic bad rates between 
+  0 and 1 and is an utility function that is not supposed to be called 
+  directly by users.
+
+  Parameters:
+    x    : A numeric vector to discretize without missing values, preferably
+           sorted in the ascending order to skip the sorting.
+    y    : A numeric vector with binary values of 0/1 and with the same length 
+           of x.
+    cuts : A list of candidates, each of which is a list of cut points.
+
+  Returns:
+    A list with the selected cut points and the list of dictionaries for the 
+    binning outcome in the same format as manual_bin(). An IndexError is raised
+    if no candidate is qualified.
+  """
+
+  _x = numpy.asarray(x, dtype = numpy.float64)
+  _y = numpy.asarray(y, dtype = numpy.float64)
+  if numpy.any(_x[1:] < _x[:-1]):
+    _o = numpy.argsort(_x, kind = "stable")
+    _x, _y = _x[_o], _y[_o]
+  _y = numpy.concatenate([[0], numpy.cumsum(_y)])
+
+  _l1 = sorted(cuts, key = lambda _: -len(_))
+  _l2 = [numpy.unique(_) for _ in _l1]
+  _l3 = numpy.split(numpy.searchsorted(_x, numpy.concatenate(_l2 + [[]]), side = "right"),
+                    numpy.cumsum([len(_) for _ in _l2])[:-1])
+
+  for _c, _j in zip(_l2, _l3):
+    _i = numpy.concatenate([[0], _j, [len(_x)]])
+    _f = numpy.diff(_i)
+    _k = _f > 0
+    _b = numpy.diff(_y[_i])[_k]
+    _r = _b / _f[_k]
+    _d = numpy.diff(_r)
+    if len(_d) > 0 and (numpy.all(_d > 0) or numpy.all(_d < 0)) and \
+       round(_r.min(), 8) > 0 and round(_r.max(), 8) < 1:
+      _s = _i[:-1][_k]
+      return([_c.tolist(),
+              [{"bin": _1 + 1, "freq": _2, "miss": 0, "bads": _3, "minx": _4, "maxx": _5} for _1, _2, _3, _4, _5 in
+               zip(numpy.flatnonzero(_k).tolist(), _f[_k].tolist(), _b.tolist(), _x[_s].tolist(), _x[_s + _f[_k] - 1].tolist())]])
+
+  raise IndexError("no candidate cut points yield monotonic bad rates between 0 and 1")
+
+
+########## 14. iso_reg() ##########
+
+def iso_reg(x, y):
+  """
+  The function fits the isotonic regression of the y vector on the x vector 
+  with the pool adjacent violators algorithm and is an utility function that 
+  is not supposed to be called directly by users. The direction of the fit
+  follows the sign of the spearman correlation between x and y.
+
+  Parameters:
+    x : A numeric vector without missing values.
+    y : A numeric vector with binary values of 0/1 and with the same length 
+        of x.
+
+  Returns:
+    A tuple of three numpy arrays with the maximum of x, the sum of y, and 
+    the frequency within each level of fitted values in the ascending order 
+    of x.
+  """
+
+  _u, _i, _n = numpy.unique(x, return_inverse = True, return_counts = True)
+  _s = numpy.bincount(_i, weights = y, minlength = len(_u))
+
+  _r = numpy.cumsum(_n) - (_n - 1) / 2
+  _d = numpy.dot(_r - (_n.sum() + 1) / 2, _s)
+  if _d < 0:
+    _s = _n - _s
+
+  _v = _s[:-1] * _n[1:] >= _s[1:] * _n[:-1]
+  while _v.any() and 4 * _v.sum() >= len(_v):
+    _j = numpy.flatnonzero(numpy.append(True, ~_v))
+    _u, _s, _n = _u[numpy.append(_j[1:], len(_u)) - 1], numpy.add.reduceat(_s, _j), numpy.add.reduceat(_n, _j)
+    _v = _s[:-1] * _n[1:] >= _s[1:] * _n[:-1]
+
+  _bx, _bs, _bn = [], [], []
+  for _1, _2, _3 in zip(_u.tolist(), _s.tolist(), _n.tolist()):
+    _bx.append(_1)
+    _bs.append(_2)
+    _bn.append(_3)
+    while len(_bs) > 1 and _bs[-2] * _bn[-1] >= _bs[-1] * _bn[-2]:
+      _bx.pop(-2)
+      _2, _3 = _bs.pop(), _bn.pop()
+      _bs[-1], _bn[-1] = _bs[-1] + _2, _bn[-1] + _3
+
+  _bs, _bn = numpy.array(_bs), numpy.array(_bn)
+
+  return(numpy.array(_bx), _bn - _bs if _d < 0 else _bs, _bn)
+
+
+########## 15. kmn_cut() ##########
+
+def kmn_cut(x, w, n):
+  """
+  The function finds the optimal k-means clustering of the x vector weighted 
+  by w for every number of clusters from 2 to n with the dynamic programming 
+  and is an utility function that is not supposed to be called directly by 
+  users.
+
+  Parameters:
+    x : A 1-D numpy array of unique values in the ascending order.
+    w : A 1-D numpy array of weights with the same length of x.
+    n : An integer indicating the maximum number of clusters.
+
+  Returns:
+    A list of tuples, one for each number of clusters, with the maximum of x 
+    within each cluster except the last one.
+  """
+
+  _m = len(x)
+  _x = x - numpy.average(x, weights = w)
+  _w, _s1, _s2 = [numpy.append(0, numpy.cumsum(_)) for _ in (w, w * _x, w * _x ** 2)]
+
+  sse = lambda i, j: _s2[j] - _s2[i] - (_s1[j] - _s1[i]) ** 2 / (_w[j] - _w[i])
+
+  _d = numpy.append(numpy.inf, sse(0, numpy.arange(1, _m + 1)))
+  _l = []
+  for _k in range(2, min(n, _m) + 1):
+    _dk, _bk = numpy.full(_m + 1, numpy.inf), numpy.zeros(_m + 1, dtype = numpy.intp)
+    _jl, _jh, _il, _ih = [numpy.array([_]) for _ in (_k, _m, _k - 1, _m - 1)]
+    while len(_jl) > 0:
+      _j = (_jl + _jh) // 2
+      _c = numpy.minimum(_ih, _j - 1) - _il + 1
+      _t = numpy.repeat(numpy.arange(len(_j)), _c)
+      _o = numpy.cumsum(_c) - _c
+      _i = _il[_t] + numpy.arange(_c.sum()) - _o[_t]
+      _v = _d[_i] + sse(_i, _j[_t])
+      _o = numpy.lexsort((_v, _t))[_o]
+      _dk[_j], _bk[_j] = _v[_o], _i[_o]
+      _jl, _jh, _il, _ih = [numpy.concatenate(_) for _ in ((_jl, _j + 1), (_j - 1, _jh), (_il, _i[_o]), (_i[_o], _ih))]
+      _jl, _jh, _il, _ih = [_[_jl <= _jh] for _ in (_jl, _jh, _il, _ih)]
+    _d = _dk
+    _l.append(_bk)
+
+  _r = []
+  for _k in range(len(_l)):
+    _j, _p = _m, []
+    for _b in _l[_k::-1]:
+      _j = _b[_j]
+      _p.insert(0, x[_j - 1])
+    _r.append(tuple(numpy.array(_p).tolist()))
+
+  return(_r)
+
+
+########## 16. qtl_bin() ##########
 
 def qtl_bin(x, y):
   """
@@ -366,33 +596,19 @@ def qtl_bin(x, y):
     |   4   |   1073 |      0 |    359 | 0.3346 |  0.6684 | 0.0978 |  0.00 | $X$ > 3.0                                     |
   """
 
-  _data = [_ for _ in zip(x, y, ~numpy.isnan(x))]
-
-  _x = [_[0] for _ in _data if _[2] == 1]
-  _y = [_[1] for _ in _data if _[2] == 1]
+  _x, _y, _m = split_nan(x, y)
+  _o = numpy.argsort(_x, kind = "stable")
+  _x, _y = _x[_o], _y[_o]
 
   _n = numpy.arange(2, max(3, min(50, len(numpy.unique(_x)) - 1)))
-  _p = set(tuple(qcut(_x, _)) for _ in _n)
-
-  _l1 = [[_, manual_bin(_x, _y, _)] for _ in _p]
-
-  _l2 = [[l[0], 
-          min([_["bads"] / _["freq"] for _ in l[1]]), 
-          max([_["bads"] / _["freq"] for _ in l[1]]),
-          scipy.stats.spearmanr([_["bin"] for _ in l[1]], [_["bads"] / _["freq"] for _ in l[1]])[0]
-         ] for l in _l1]
-
-  _l3 = [l[0] for l in sorted(_l2, key = lambda x: -len(x[0]))
-         if numpy.abs(round(l[3], 8)) == 1 and round(l[1], 8) > 0 and round(l[2], 8) < 1][0]
-
-  _l4 = sorted(*[l[1] for l in _l1 if l[0] == _l3], key = lambda x: x["bads"] / x["freq"])
+  _p = set(tuple(qcut_sorted(_x, _).tolist()) for _ in _n)
 
-  _l5 = add_miss(_data, _l4)
+  _l3, _l2 = cut_bin(_x, _y, _p)
 
-  return({"cut": _l3, "tbl": gen_rule(gen_woe(_l5), _l3)})
+  return(gen_bin(_m, _l3, _l2))
 
 
-########## 11. bad_bin() ##########
+########## 17. bad_bin() ##########
 
 def bad_bin(x, y):
   """
@@ -426,34 +642,21 @@ def bad_bin(x, y):
     |   4   |    818 |      0 |    269 | 0.3289 |  0.6426 | 0.0685 |  0.00 | $X$ > 4.0                                     |
   """
 
-  _data = [_ for _ in zip(x, y, ~numpy.isnan(x))]
+  _x, _y, _m = split_nan(x, y)
+  _o = numpy.argsort(_x, kind = "stable")
+  _x, _y = _x[_o], _y[_o]
 
-  _x = [_[0] for _ in _data if _[2] == 1]
-  _y = [_[1] for _ in _data if _[2] == 1]
+  _xs = _x[_y == 1]
+  _n = numpy.arange(2, max(3, min(50, len(numpy.unique(_xs)) - 1)))
 
-  _n = numpy.arange(2, max(3, min(50, len(numpy.unique([_[0] for _ in _data if _[1] == 1 and _[2] == 1])) - 1)))
+  _p = set(tuple(qcut_sorted(_xs, _).tolist()) for _ in _n)
 
-  _p = set(tuple(qcut([_[0] for _ in _data if _[1] == 1 and _[2] == 1], _)) for _ in _n)
+  _l3, _l2 = cut_bin(_x, _y, _p)
 
-  _l1 = [[_, manual_bin(_x, _y, _)] for _ in _p]
+  return(gen_bin(_m, _l3, _l2))
 
-  _l2 = [[l[0], 
-          min([_["bads"] / _["freq"] for _ in l[1]]), 
-          max([_["bads"] / _["freq"] for _ in l[1]]),
-          scipy.stats.spearmanr([_["bin"] for _ in l[1]], [_["bads"] / _["freq"] for _ in l[1]])[0]
-         ] for l in _l1]
 
-  _l3 = [l[0] for l in sorted(_l2, key = lambda x: -len(x[0]))
-         if numpy.abs(round(l[3], 8)) == 1 and round(l[1], 8) > 0 and round(l[2], 8) < 1][0]
-
-  _l4 = sorted(*[l[1] for l in _l1 if l[0] == _l3], key = lambda x: x["bads"] / x["freq"])
-
-  _l5 = add_miss(_data, _l4)
-
-  return({"cut": _l3, "tbl": gen_rule(gen_woe(_l5), _l3)})
-
-
-########## 12. iso_bin() ##########
+########## 18. iso_bin() ##########
 
 def iso_bin(x, y):
   """
@@ -487,36 +690,18 @@ def iso_bin(x, y):
     |   5   |      9 |      0 |      6 | 0.6667 |  2.0491 | 0.0090 |  0.00 | $X$ > 23.0                                    |
   """
 
-  _data = [_ for _ in zip(x, y, ~numpy.isnan(x))]
-
-  _x = [_[0] for _ in _data if _[2] == 1]
-  _y = [_[1] for _ in _data if _[2] == 1]
-
-  _cor = scipy.stats.spearmanr(_x, _y)[0]
-  _reg = sklearn.isotonic.IsotonicRegression()
-
-  _f = numpy.abs(_reg.fit_transform(_x, list(map(lambda y:  y * _cor / numpy.abs(_cor), _y))))
-
-  _l1 = sorted(list(zip(_f, _x, _y)), key = lambda x: x[0])
+  _x, _y, _m = split_nan(x, y)
 
-  _l2 = [[l for l in _l1 if l[0] == f] for f in sorted(set(_f))]
+  _mx, _sy, _n = iso_reg(_x, _y)
+  _my = _sy / _n
 
-  _l3 = [[*set(_[0] for _ in l),
-          max(_[1] for _ in l),
-          numpy.mean([_[2] for _ in l]),
-          sum(_[2] for _ in l)] for l in _l2]
-
-  _c = sorted([_[1] for _ in [l for l in _l3 if l[2] < 1 and l[2] > 0 and l[3] > 1]])
+  _c = sorted(_mx[(_my < 1) & (_my > 0) & (_sy > 1)].tolist())
   _p = _c[1:-1] if len(_c) > 2 else _c[:-1]
     
-  _l4 = sorted(manual_bin(_x, _y, _p), key = lambda x: x["bads"] / x["freq"])
-
-  _l5 = add_miss(_data, _l4)
+  return(gen_bin(_m, _p, manual_bin(_x, _y, _p)))
 
-  return({"cut": _p, "tbl": gen_rule(gen_woe(_l5), _p)})
 
-
-########## 13. rng_bin() ##########
+########## 19. rng_bin() ##########
 
 def rng_bin(x, y):
   """
@@ -549,37 +734,23 @@ def rng_bin(x, y):
     |   4   |     13 |      0 |      6 | 0.4615 |  1.2018 | 0.0042 | 0.00 | $X$ > 21.0                                    |
   """
 
-  _data = [_ for _ in zip(x, y, ~numpy.isnan(x))]
-
-  _x = [_[0] for _ in _data if _[2] == 1]
-  _y = [_[1] for _ in _data if _[2] == 1]
-
-  _n = numpy.arange(2, max(3, min(50, len(numpy.unique(_x)) - 1)))
-
-  _m = [[numpy.median([_[0] for _ in _data if _[2] == 1 and _[1] == 1])],
-        [numpy.median([_[0] for _ in _data if _[2] == 1])]]
-
-  _p = list(set(tuple(qcut(numpy.unique(_x), _)) for _ in _n)) + _m
+  _x, _y, _m = split_nan(x, y)
+  _o = numpy.argsort(_x, kind = "stable")
+  _x, _y = _x[_o], _y[_o]
 
-  _l1 = [[_, manual_bin(_x, _y, _)] for _ in _p]
+  _xs = numpy.unique(_x)
+  _n = numpy.arange(2, max(3, min(50, len(_xs) - 1)))
 
-  _l2 = [[l[0], 
-          min([_["bads"] / _["freq"] for _ in l[1]]), 
-          max([_["bads"] / _["freq"] for _ in l[1]]),
-          scipy.stats.spearmanr([_["bin"] for _ in l[1]], [_["bads"] / _["freq"] for _ in l[1]])[0]
-         ] for l in _l1]
+  _md = [numpy.median(_x[_y == 1], keepdims = True), numpy.median(_x, keepdims = True)]
 
-  _l3 = [l[0] for l in sorted(_l2, key = lambda x: -len(x[0]))
-         if numpy.abs(round(l[3], 8)) == 1 and round(l[1], 8) > 0 and round(l[2], 8) < 1][0]
+  _p = list(set(tuple(qcut_sorted(_xs, _).tolist()) for _ in _n)) + _md
 
-  _l4 = sorted(*[l[1] for l in _l1 if l[0] == _l3], key = lambda x: x["bads"] / x["freq"])
+  _l3, _l2 = cut_bin(_x, _y, _p)
 
-  _l5 = add_miss(_data, _l4)
+  return(gen_bin(_m, _l3, _l2))
 
-  return({"cut": _l3, "tbl": gen_rule(gen_woe(_l5), _l3)})
 
-
-########## 14. kmn_bin() ##########
+########## 20. kmn_bin() ##########
 
 def kmn_bin(x, y):
   """
@@ -600,57 +771,34 @@ def kmn_bin(x, y):
 
   Example:
     kmn_bin(derog, bad)['cut']
-    # [1.0, 5.0, 11.0]
+    # [2.0, 8.0]
 
     view_bin(kmn_bin(derog, bad)) 
     |  bin  |   freq |   miss |   bads |   rate |     woe |     iv |    ks |                     rule                      |
     |-------|--------|--------|--------|--------|---------|--------|-------|-----------------------------------------------|
     |   0   |    213 |    213 |     70 | 0.3286 |  0.6416 | 0.0178 |  2.77 | numpy.isnan($X$)                              |
-    |   1   |   3741 |      0 |    560 | 0.1497 | -0.3811 | 0.0828 | 18.95 | $X$ <= 1.0                                    |
-    |   2   |   1249 |      0 |    366 | 0.2930 |  0.4753 | 0.0550 |  7.37 | $X$ > 1.0 and $X$ <= 5.0                      |
-    |   3   |    504 |      0 |    157 | 0.3115 |  0.5629 | 0.0318 |  1.72 | $X$ > 5.0 and $X$ <= 11.0                     |
-    |   4   |    130 |      0 |     43 | 0.3308 |  0.6512 | 0.0112 |  0.00 | $X$ > 11.0                                    |
+    |   1   |   4219 |      0 |    681 | 0.1614 | -0.2918 | 0.0563 | 16.52 | $X$ <= 2.0                                    |
+    |   2   |   1103 |      0 |    345 | 0.3128 |  0.5688 | 0.0712 |  4.01 | $X$ > 2.0 and $X$ <= 8.0                      |
+    |   3   |    302 |      0 |    100 | 0.3311 |  0.6528 | 0.0262 |  0.00 | $X$ > 8.0                                     |
   """
 
-  _data = [_ for _ in zip(x, y, ~numpy.isnan(x))]
-
-  _x = [_[0] for _ in _data if _[2] == 1]
-  _y = [_[1] for _ in _data if _[2] == 1]
-
-  _n = numpy.arange(2, max(3, min(20, len(numpy.unique(_x)) - 1)))
-
-  _m = [[numpy.median([_[0] for _ in _data if _[2] == 1 and _[1] == 1])],
-        [numpy.median([_[0] for _ in _data if _[2] == 1])]]
-
-  _c1 = [sklearn.cluster.KMeans(n_clusters = _, random_state = 1).fit(numpy.reshape(_x, [-1, 1])).labels_ for _ in _n]
+  _x, _y, _m = split_nan(x, y)
+  _o = numpy.argsort(_x, kind = "stable")
+  _x, _y = _x[_o], _y[_o]
 
-  _c2 = [sorted(_l, key = lambda x: x[0]) for _l in [list(zip(_, _x)) for _ in _c1]]
+  _u, _w = numpy.unique(_x, return_counts = True)
+  _n = max(3, min(20, len(_u) - 1)) - 1
 
-  group = lambda x: [[_l for _l in x if _l[0] == _k] for _k in set([_[0] for _ in x])]
+  _md = [[numpy.median(_x[_y == 1])], [numpy.median(_x)]]
 
-  upper = lambda x: sorted([max([_2[1] for _2 in _1]) for _1 in x])
+  _c3 = kmn_cut(_u, _w, _n) + _md
 
-  _c3 = list(set(tuple(upper(_2)[:-1]) for _2 in [group(_1) for _1 in _c2])) + _m
+  _l3, _l2 = cut_bin(_x, _y, _c3)
 
-  _l1 = [[_, manual_bin(_x, _y, _)] for _ in _c3]
+  return(gen_bin(_m, _l3, _l2))
 
-  _l2 = [[l[0], 
-          min([_["bads"] / _["freq"] for _ in l[1]]), 
-          max([_["bads"] / _["freq"] for _ in l[1]]),
-          scipy.stats.spearmanr([_["bin"] for _ in l[1]], [_["bads"] / _["freq"] for _ in l[1]])[0]
-         ] for l in _l1]
 
-  _l3 = [l[0] for l in sorted(_l2, key = lambda x: -len(x[0]))
-         if numpy.abs(round(l[3], 8)) == 1 and round(l[1], 8) > 0 and round(l[2], 8) < 1][0]
-
-  _l4 = sorted(*[l[1] for l in _l1 if l[0] == _l3], key = lambda x: x["bads"] / x["freq"])
-
-  _l5 = add_miss(_data, _l4)
-
-  return({"cut": _l3, "tbl": gen_rule(gen_woe(_l5), _l3)})
-
-
-########## 15. gbm_bin() ########## 
+########## 21. gbm_bin() ########## 
 
 def gbm_bin(x, y):
   """
@@ -685,35 +833,29 @@ def gbm_bin(x, y):
     |   6   |      4 |      0 |      3 | 0.7500 |  2.4546 | 0.0056 |  0.00 | $X$ > 26.0                                    |
   """
 
-  _data = [_ for _ in zip(x, y, ~numpy.isnan(x))]
+  import scipy.stats, lightgbm
 
-  _x = [_[0] for _ in _data if _[2] == 1]
-  _y = [_[1] for _ in _data if _[2] == 1]
+  _x, _y, _m = split_nan(x, y)
 
   _cor = scipy.stats.spearmanr(_x, _y)[0]
   _con = "1" if _cor > 0 else "-1"
 
   _gbm = lightgbm.LGBMRegressor(num_leaves = 100, min_child_samples = 3, n_estimators = 1,
                                 random_state = 1, monotone_constraints = _con)
-  _gbm.fit(numpy.reshape(_x, [-1, 1]), _y)
-
-  _f = numpy.abs(_gbm.predict(numpy.reshape(_x, [-1, 1])))
+  _u, _v, _n = numpy.unique(_x, return_inverse = True, return_counts = True)
+  _gbm.fit(_x.reshape(-1, 1), _y.astype(numpy.float32))
 
-  _l1 = sorted(list(zip(_f, _x, _y)), key = lambda x: x[0])
+  _f = numpy.abs(_gbm.predict(_u.reshape(-1, 1)))
 
-  _l2 = [[l for l in _l1 if l[0] == f] for f in sorted(set(_f))]
+  _o = numpy.argsort(_f, kind = "stable")
+  _i = numpy.flatnonzero(numpy.r_[True, _f[_o][1:] != _f[_o][:-1]])
 
-  _l3 = [[*set(_[0] for _ in l),
-          max(_[1] for _ in l),
-          numpy.mean([_[2] for _ in l]),
-          sum(_[2] for _ in l)] for l in _l2]
+  _mx = numpy.maximum.reduceat(_u[_o], _i)
+  _sy = numpy.add.reduceat(numpy.bincount(_v, weights = _y, minlength = len(_u))[_o], _i)
+  _my = _sy / numpy.add.reduceat(_n[_o], _i)
 
-  _c = sorted([_[1] for _ in [l for l in _l3 if l[2] < 1 and l[2] > 0 and l[3] > 1]])
+  _c = sorted(_mx[(_my < 1) & (_my > 0) & (_sy > 1)].tolist())
 
   _p = _c[1:-1] if len(_c) > 2 else _c[:-1]
     
-  _l4 = sorted(manual_bin(_x, _y, _p), key = lambda x: x["bads"] / x["freq"])
-
-  _l5 = add_miss(_data, _l4)
-
-  return({"cut": _p, "tbl": gen_rule(gen_woe(_l5), _p)})
+  return(gen_bin(_m, _p, manual_bin(_x, _y, _p)))